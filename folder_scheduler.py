@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+folder_scheduler.py
+
+Порядок обработки папок для git_batch*.py вместо sorted(os.listdir()).
+
+Поведение:
+ - перечисляет подпапки через os.scandir (без списков всего дерева в памяти);
+ - policy="name" — прежний алфавитный порядок, без подсчёта размеров;
+ - иначе одним git status находит папки с изменениями и только для них
+   оценивает "стоимость" по размеру и числу файлов; папки без изменений
+   (git_batch*.py их сразу пропускают) идут в конце по алфавиту;
+ - оценки кешируются в folder_index.json рядом со скриптом и пересчитываются,
+   только если изменилось mtime папки (оценка приблизительная: правки глубоко
+   внутри папки её не сдвигают, но для порядка обработки этого достаточно);
+ - недостающие оценки считаются параллельно в пуле потоков.
+
+git_batch*.py коммитят в один репозиторий строго по очереди, поэтому порядок
+не сокращает общее время прогона — он лишь выводит тяжёлые папки вперёд
+(их ошибки и push видны раньше). По умолчанию там стоит "name".
+"""
+
+import os
+import json
+import subprocess
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+# --------------
+INDEX_FILE = os.path.join(os.path.dirname(__file__), "folder_index.json")
+SCAN_WORKERS = 8           # потоков для подсчёта размеров
+FILE_COST_BYTES = 64 * 1024  # накладные расходы git на один файл, в "байтах"
+# --------------
+
+POLICIES = ("cost", "size", "files", "name")
+
+
+def iter_subdirs(base_path, exclude=()):
+    """Потоково отдаёт имена подпапок base_path (кроме exclude)."""
+    with os.scandir(base_path) as it:
+        for entry in it:
+            if entry.name in exclude:
+                continue
+            if entry.is_dir():
+                yield entry.name
+
+
+def changed_subdirs(repo_root, base_path):
+    """Имена подпапок base_path, в которых git status видит изменения."""
+    rel = os.path.relpath(os.path.abspath(base_path), os.path.abspath(repo_root)).replace("\\", "/")
+    prefix = "" if rel == "." else rel.rstrip("/") + "/"
+    res = subprocess.run(["git", "status", "--porcelain", "-z", "--", rel], cwd=repo_root,
+                         capture_output=True, encoding="utf-8", check=False)
+    if res.returncode != 0:
+        logging.warning(f"[scan] git status вернул код {res.returncode}, считаю изменёнными все папки")
+        return None
+
+    changed = set()
+    entries = iter(res.stdout.split("\0"))
+    for entry in entries:
+        if len(entry) < 4:
+            continue
+        status, path = entry[:2], entry[3:]
+        if "R" in status or "C" in status:
+            next(entries, None)  # за переименованием следует исходный путь
+        if path.startswith(prefix):
+            changed.add(path[len(prefix):].split("/", 1)[0])
+    return changed
+
+
+def folder_stats(folder_path):
+    """Считает (суммарный размер, число файлов) папки, не заходя в .git."""
+    total_size = 0
+    total_files = 0
+    stack = [folder_path]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name != ".git":
+                                stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            total_size += entry.stat(follow_symlinks=False).st_size
+                            total_files += 1
+                    except OSError:
+                        continue
+        except OSError as e:
+            logging.warning(f"[scan] Не удалось прочитать {current}: {e}")
+    return total_size, total_files
+
+
+def load_index(index_file=INDEX_FILE):
+    if not os.path.isfile(index_file):
+        return {}
+    try:
+        with open(index_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logging.warning(f"[scan] Индекс {index_file} не прочитан, пересчитываю: {e}")
+        return {}
+
+
+def save_index(index, index_file=INDEX_FILE):
+    tmp_file = index_file + ".tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False)
+    os.replace(tmp_file, index_file)
+
+
+def _sort_key(policy, stats):
+    size, files = stats["size"], stats["files"]
+    if policy == "size":
+        return -size
+    if policy == "files":
+        return -files
+    return -(size + files * FILE_COST_BYTES)
+
+
+def schedule_folders(base_path, exclude=(), policy="cost", repo_root=None, index_file=INDEX_FILE):
+    """
+    Возвращает (имена подпапок base_path в порядке обработки,
+                {имя: {"size", "files", "mtime"}} для папок, где считались размеры).
+    repo_root — корень git-репозитория: размеры считаются только для папок
+    с изменениями (без него — для всех).
+    policy:
+      cost  — размер + FILE_COST_BYTES на файл, самые тяжёлые первыми;
+      size  — по размеру, самые большие первыми;
+      files — по числу файлов, самые многочисленные первыми;
+      name  — по алфавиту (прежнее поведение, без подсчёта размеров).
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"Неизвестная политика планирования: {policy} (доступны: {', '.join(POLICIES)})")
+
+    names = list(iter_subdirs(base_path, exclude))
+    if policy == "name":
+        return sorted(names), {}
+
+    changed = changed_subdirs(repo_root, base_path) if repo_root else None
+    to_measure = [name for name in names if changed is None or name in changed]
+    unchanged = sorted(name for name in names if changed is not None and name not in changed)
+
+    index = load_index(index_file)
+    folders = {}
+    stale = []
+    for name in to_measure:
+        folder_path = os.path.abspath(os.path.join(base_path, name))
+        try:
+            mtime = os.stat(folder_path).st_mtime
+        except OSError:
+            mtime = None
+        cached = index.get(folder_path)
+        if cached and mtime is not None and cached.get("mtime") == mtime:
+            folders[name] = cached
+        else:
+            stale.append((name, folder_path, mtime))
+
+    if stale:
+        logging.info(f"[scan] Пересчёт размеров: {len(stale)} из {len(to_measure)} изменённых папок")
+        with ThreadPoolExecutor(max_workers=SCAN_WORKERS) as pool:
+            results = pool.map(folder_stats, [folder_path for _, folder_path, _ in stale])
+            for (name, folder_path, mtime), (size, files) in zip(stale, results):
+                stats = {"mtime": mtime, "size": size, "files": files}
+                index[folder_path] = stats
+                folders[name] = stats
+        try:
+            save_index(index, index_file)
+        except OSError as e:
+            logging.warning(f"[scan] Не удалось сохранить индекс {index_file}: {e}")
+
+    # имя — вторичный ключ, чтобы порядок был стабильным между запусками
+    ordered = sorted(folders, key=lambda name: (_sort_key(policy, folders[name]), name))
+    return ordered + unchanged, folders
@@ -7,33 +7,36 @@ git_batch.py
  - пропускает .git;
  - если папка уже коммичена (нет изменений) — пропускает;
  - иначе делает git add, commit, push;
- - при fatal-ошибках логирует в log.txt и (опционально) удаляет папку.
+ - при fatal-ошибках логирует в log.jsonl и (опционально) удаляет папку;
+ - каждый шаг (folder, stage, duration, bytes, exit_code) пишется в log.jsonl,
+   отчёт по нему — run_report.py.
 """
 
 import os
 import subprocess
 import sys
+import time
 import logging
 from datetime import datetime
 
+from folder_scheduler import schedule_folders, folder_stats
+from jsonl_log import setup_logging, log_event
+
 # ---------------------------
-LOG_FILE = os.path.join(os.path.dirname(__file__), "log.txt")
+LOG_FILE = os.path.join(os.path.dirname(__file__), "log.jsonl")
 DELETE_ON_FATAL = False  # <- если True — удаляет папку при fatal
+SCHEDULE_POLICY = "name"  # порядок папок: name / cost / size / files (см. folder_scheduler.py)
 # ---------------------------
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    handlers=[
-        logging.FileHandler(LOG_FILE, encoding="utf-8"),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+setup_logging(LOG_FILE)
 
 
-def run_git(args, cwd):
-    """Запускает git с аргументами args (список) в каталоге cwd."""
+def run_git(args, cwd, folder=None):
+    """Запускает git с аргументами args (список) в каталоге cwd.
+    Пишет событие шага (folder, stage, duration, exit_code) в лог.
+    """
     cmd = ["git"] + args
+    started = time.monotonic()
     result = subprocess.run(
         cmd,
         cwd=cwd,
@@ -41,6 +44,12 @@ def run_git(args, cwd):
         text=True,
         check=False
     )
+    error = None
+    if result.returncode != 0:
+        lines = ((result.stderr or "") + (result.stdout or "")).strip().splitlines()
+        error = lines[0][:200] if lines else None
+    log_event(args[0], folder, duration=round(time.monotonic() - started, 3),
+              exit_code=result.returncode, error=error)
     return result
 
 
@@ -55,7 +64,7 @@ def has_changes(dirname, repo_root):
     Возвращает True, если есть что коммитить.
     """
     # Проверим git status --porcelain только для этой папки
-    res = run_git(["status", "--porcelain", dirname], cwd=repo_root)
+    res = run_git(["status", "--porcelain", dirname], cwd=repo_root, folder=dirname)
     output = (res.stdout or "").strip()
     if output == "":
         return False  # нет изменений
@@ -74,11 +83,9 @@ def main():
         sys.exit(1)
 
     repo_root = target_path
-    entries = sorted(os.listdir(target_path))
-    dirs = [
-        d for d in entries
-        if os.path.isdir(os.path.join(target_path, d)) and d != ".git" and d != "github" and d != "infra"
-    ]
+    # Порядок по SCHEDULE_POLICY; размеры — только у изменённых папок (для лога)
+    dirs, dir_stats = schedule_folders(target_path, exclude={".git", "github", "infra"},
+                                       policy=SCHEDULE_POLICY, repo_root=repo_root)
 
     #if(not os.path.isdir(target_path + "/.git")):
     #    run_git(["init"], cwd=repo_root)
@@ -88,15 +95,17 @@ def main():
 
     for dirname in dirs:
         folder_path = os.path.join(target_path, dirname)
+        folder_started = time.monotonic()
         logging.info(f"▶ Обрабатываю папку: {dirname}")
 
         # --- Проверяем, есть ли изменения в папке
         if not has_changes(dirname, repo_root):
             logging.info(f"[SKIP] Папка '{dirname}' уже закоммичена, пропускаю.")
+            log_event("skip", dirname)
             continue
 
         # --- git add
-        add_res = run_git(["add", f"{dirname}/"], cwd=repo_root)
+        add_res = run_git(["add", f"{dirname}/"], cwd=repo_root, folder=dirname)
         combined_add = (add_res.stdout or "") + "\n" + (add_res.stderr or "")
 
         if add_res.returncode != 0:
@@ -115,7 +124,7 @@ def main():
                 continue
 
         # --- git commit
-        commit_res = run_git(["commit", "-m", dirname], cwd=repo_root)
+        commit_res = run_git(["commit", "-m", dirname], cwd=repo_root, folder=dirname)
         combined_commit = (commit_res.stdout or "") + "\n" + (commit_res.stderr or "")
 
         if commit_res.returncode != 0:
@@ -131,13 +140,14 @@ def main():
                 continue
             elif "nothing to commit" in combined_commit.lower():
                 logging.info(f"[commit] Нечего коммитить для {dirname}")
+                log_event("skip", dirname)
                 continue
             else:
                 logging.warning(f"[commit] Ошибка коммита {dirname}: {combined_commit.strip()}")
                 continue
 
         # --- git push
-        push_res = run_git(["push"], cwd=repo_root)
+        push_res = run_git(["push"], cwd=repo_root, folder=dirname)
         combined_push = (push_res.stdout or "") + "\n" + (push_res.stderr or "")
 
         if push_res.returncode != 0:
@@ -156,6 +166,8 @@ def main():
                 continue
 
         logging.info(f"[OK] Успешно обработано и запушено: {dirname}")
+        log_event("done", dirname, duration=round(time.monotonic() - folder_started, 3),
+                  bytes=dir_stats[dirname]["size"] if dirname in dir_stats else folder_stats(folder_path)[0])
 
     logging.info("✅ Все папки обработаны.")
 
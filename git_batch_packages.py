@@ -13,37 +13,39 @@ git_batch_packages.py
  - для каждой подпапки делает отдельный git add / git commit с сообщением:
        packages -> <package_name>
  - каждые 5 успешных коммитов выполняет git push
- - логирует fatal-ошибки в log.txt рядом со скриптом и пропускает проблемную папку
+ - логирует fatal-ошибки в log_packages.jsonl рядом со скриптом и пропускает проблемную папку
+ - каждый шаг (folder, stage, duration, bytes, exit_code) пишется туда же, отчёт — run_report.py
  - игнорирует .git и папки без изменений (ничего коммитить)
 """
 
 import os
 import sys
 import subprocess
+import time
 import logging
 from datetime import datetime
 
+from folder_scheduler import schedule_folders, folder_stats
+from jsonl_log import setup_logging, log_event
+
 # --------------
-LOG_FILE = os.path.join(os.path.dirname(__file__), "log_packages.txt")
+LOG_FILE = os.path.join(os.path.dirname(__file__), "log_packages.jsonl")
 DELETE_ON_FATAL = False   # если True — при fatal будет пытаться удалить проблемную папку (опасно)
 PUSH_BATCH_SIZE = 5       # пуш каждые N успешных коммитов
+SCHEDULE_POLICY = "name"  # порядок папок: name / cost / size / files (см. folder_scheduler.py)
 # --------------
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    handlers=[
-        logging.FileHandler(LOG_FILE, encoding="utf-8"),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+setup_logging(LOG_FILE)
 
 
-def run_git(args, cwd):
+def run_git(args, cwd, folder=None):
     """Запускает git с аргументами args (list) в каталоге cwd.
     Возвращает CompletedProcess; при отсутствии git — выбрасывает исключение.
+    Пишет событие шага (folder, stage, duration, exit_code) в лог;
+    folder может быть списком — тогда пишется одно событие с полем folders (пуш пачки).
     """
     cmd = ["git"] + args
+    started = time.monotonic()
     try:
         res = subprocess.run(
             cmd,
@@ -55,9 +57,25 @@ def run_git(args, cwd):
     except FileNotFoundError as e:
         logging.error("Git не найден в PATH. Установите git и попробуйте снова.")
         raise
+    error = None
+    if res.returncode != 0:
+        lines = ((res.stderr or "") + (res.stdout or "")).strip().splitlines()
+        error = lines[0][:200] if lines else None
+    duration = round(time.monotonic() - started, 3)
+    if isinstance(folder, list):
+        log_event(args[0], folders=folder, duration=duration, exit_code=res.returncode, error=error)
+    else:
+        log_event(args[0], folder, duration=duration, exit_code=res.returncode, error=error)
     return res
 
 
+def log_pushed(unpushed):
+    """Итоговое событие done по каждой папке успешно запушенной пачки."""
+    for folder, size, duration in unpushed:
+        log_event("done", folder, duration=duration, bytes=size)
+    unpushed.clear()
+
+
 def contains_fatal(text):
     if not text:
         return False
@@ -70,7 +88,7 @@ def has_changes_for_package(repo_root, package_rel_path):
     Возвращает True если есть изменения (нужно коммитить), False если пусто.
     Использует: git status --porcelain <path>
     """
-    res = run_git(["status", "--porcelain", "--", package_rel_path], cwd=repo_root)
+    res = run_git(["status", "--porcelain", "--", package_rel_path], cwd=repo_root, folder=package_rel_path)
     output = (res.stdout or "") + (res.stderr or "")
     # Если git вернул ошибку (например, путь некорректен) — тоже считаем, что изменений нет,
     # но логируем stderr.
@@ -99,22 +117,28 @@ def main():
         sys.exit(1)
 
     # Получаем список подпапок (игнорируем .git)
-    entries = sorted(os.listdir(packages_dir))
-    package_names = [name for name in entries if os.path.isdir(os.path.join(packages_dir, name)) and name != ".git"]
+    # порядок по SCHEDULE_POLICY; размеры — только у изменённых папок (для лога)
+    package_names, folder_sizes = schedule_folders(packages_dir, exclude={".git"}, policy=SCHEDULE_POLICY,
+                                                   repo_root=repo_root)
 
     logging.info(f"Найдено пакетов в packages/: {len(package_names)}")
 
     successful_commits_since_last_push = 0
+    # закоммиченные, но ещё не запушенные папки: (путь, размер, время обработки);
+    # после неудачного пуша остаются здесь до следующего успешного
+    unpushed = []
 
     for pkg in package_names:
         pkg_rel = os.path.join("packages", pkg)  # относительный путь для git команд
         pkg_abs = os.path.join(packages_dir, pkg)
+        folder_started = time.monotonic()
         logging.info(f"▶ Обрабатывается пакет: {pkg}")
 
         # Пропустить, если нет изменений
         try:
             if not has_changes_for_package(repo_root, pkg_rel):
                 logging.info(f"[SKIP] Пакет '{pkg}' — нечего коммитить, пропускаю.")
+                log_event("skip", pkg_rel)
                 continue
         except Exception as e:
             logging.error(f"[ERROR] Не удалось проверить статус для {pkg}: {e}")
@@ -123,7 +147,7 @@ def main():
 
         # git add packages/<pkg>/
         try:
-            add_res = run_git(["add", "--", f"{pkg_rel}/"], cwd=repo_root)
+            add_res = run_git(["add", "--", f"{pkg_rel}/"], cwd=repo_root, folder=pkg_rel)
         except Exception:
             logging.error(f"[FATAL] Не удалось выполнить git add для {pkg} — git отсутствует.")
             sys.exit(1)
@@ -146,7 +170,7 @@ def main():
 
         # git commit -m "packages -> <pkg>"
         commit_message = f"packages -> {pkg}"
-        commit_res = run_git(["commit", "-m", commit_message, "--", f"{pkg_rel}/"], cwd=repo_root)
+        commit_res = run_git(["commit", "-m", commit_message, "--", f"{pkg_rel}/"], cwd=repo_root, folder=pkg_rel)
         combined_commit = (commit_res.stdout or "") + (commit_res.stderr or "")
 
         if commit_res.returncode != 0:
@@ -162,6 +186,7 @@ def main():
                 continue
             elif "nothing to commit" in combined_commit.lower():
                 logging.info(f"[commit] Нечего коммитить для {pkg} (после add).")
+                log_event("skip", pkg_rel)
                 continue
             else:
                 logging.warning(f"[commit] non-zero exit для {pkg}: {combined_commit.strip()}")
@@ -170,10 +195,12 @@ def main():
         # Успешный коммит
         successful_commits_since_last_push += 1
         logging.info(f"[OK][commit] Успешно закоммичен пакет: {pkg} (batch count: {successful_commits_since_last_push})")
+        unpushed.append((pkg_rel, folder_sizes[pkg]["size"] if pkg in folder_sizes else folder_stats(pkg_abs)[0],
+                         round(time.monotonic() - folder_started, 3)))
 
         # Если набралось PUSH_BATCH_SIZE коммитов — пушим
         if successful_commits_since_last_push >= PUSH_BATCH_SIZE:
-            push_res = run_git(["push"], cwd=repo_root)
+            push_res = run_git(["push"], cwd=repo_root, folder=[item[0] for item in unpushed])
             combined_push = (push_res.stdout or "") + (push_res.stderr or "")
             if push_res.returncode != 0:
                 if contains_fatal(combined_push):
@@ -184,13 +211,14 @@ def main():
                 # после неудачного push мы продолжаем — локальные коммиты останутся
             else:
                 logging.info(f"[OK][push] Успешно запушено после {successful_commits_since_last_push} коммитов.")
+                log_pushed(unpushed)
             successful_commits_since_last_push = 0
 
     # В конце пушим остаток, если есть
     if successful_commits_since_last_push > 0:
         logging.info(f"Пуш остатка: {successful_commits_since_last_push} коммит(ов).")
         # don't fix origin commit
-        push_res = run_git(["push"], cwd=repo_root)
+        push_res = run_git(["push"], cwd=repo_root, folder=[item[0] for item in unpushed])
         combined_push = (push_res.stdout or "") + (push_res.stderr or "")
         if push_res.returncode != 0:
             if contains_fatal(combined_push):
@@ -199,6 +227,7 @@ def main():
                 logging.warning(f"[push] non-zero exit при финальном пуше: {combined_push.strip()}")
         else:
             logging.info("[OK][push] Финальный push успешен.")
+            log_pushed(unpushed)
 
     logging.info("Готово. Все пакеты обработаны.")
 
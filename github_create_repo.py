@@ -1,8 +1,11 @@
 import os
+import stat
 import subprocess
 import requests
 import json
 
+from shared_store import link_to_shared_store, shared_store_env, pin_in_shared_store
+
 # === ЗАГРУЗКА КОНФИГА ===
 with open("config.json", "r", encoding="utf-8") as f:
     config = json.load(f)
@@ -11,6 +14,16 @@ GITHUB_TOKEN = config["github_token"]  # Токен теперь из файла
 ORG_NAME = "biggest-backups-projects"
 BASE_PATH = r"x:\.trash\ya"
 
+# Общее хранилище объектов для всех репозиториев (None — каждый .git хранит всё сам).
+# Папка с "+" в начале не попадает в обход main().
+SHARED_STORE = None  # например r"x:\.trash\ya\+shared-objects.git"
+
+# Дозаливать изменения поверх main на GitHub вместо git push --force с нуля.
+# Для каждого репо храним манифест (путь, размер, mtime, blob) — по нему
+# повторно хешируются только изменившиеся файлы.
+INCREMENTAL = True
+MANIFEST_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "manifests")
+
 # GitHub API endpoint
 GITHUB_API = "https://api.github.com"
 
@@ -40,27 +53,186 @@ def create_repo(repo_name):
         print(f"[ERR] Не удалось создать {repo_name}: {r.status_code} {r.text}")
         return False
 
+def git_output(args, folder_path, env=None, input=None):
+    """git с аргументами args в folder_path; возвращает stdout (stderr идёт в консоль)"""
+    return subprocess.run(["git"] + args, cwd=folder_path, env=env, input=input,
+                          stdout=subprocess.PIPE, encoding="utf-8", check=True).stdout
+
+def load_manifest(repo_name):
+    """(head, {путь: [размер, mtime_ns, blob]}) последней заливки или (None, {})"""
+    manifest_path = os.path.join(MANIFEST_DIR, f"{repo_name}.json")
+    if not os.path.isfile(manifest_path):
+        return None, {}
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data.get("head"), data.get("files", {})
+    except (OSError, ValueError, AttributeError) as e:
+        print(f"[WARN] Манифест {manifest_path} не прочитан, хеширую всё заново: {e}")
+        return None, {}
+
+def save_manifest(repo_name, head, files):
+    os.makedirs(MANIFEST_DIR, exist_ok=True)
+    manifest_path = os.path.join(MANIFEST_DIR, f"{repo_name}.json")
+    with open(manifest_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"head": head, "files": files}, f, ensure_ascii=False)
+    os.replace(manifest_path + ".tmp", manifest_path)
+
+def stat_listed_files(folder_path, env=None):
+    """{путь: (размер, mtime_ns)} для файлов, которые увидел бы git add .
+    Снимается до git add: если файл изменится между stat и хешированием,
+    в манифест попадёт старый mtime и следующий запуск его просто перехеширует.
+    """
+    listed = git_output(["ls-files", "--cached", "--others", "--exclude-standard", "-z"], folder_path, env)
+    stats = {}
+    for path in filter(None, listed.split("\0")):
+        try:
+            st = os.lstat(os.path.join(folder_path, path))
+        except OSError:
+            continue
+        stats[path] = (st.st_size, st.st_mtime_ns)
+    return stats
+
+def save_manifest_from_index(folder_path, repo_name, stats, env=None):
+    """Манифест после полной заливки: blob-ы берём из индекса, размер и mtime — из stats"""
+    head = git_output(["rev-parse", "HEAD"], folder_path, env).strip()
+    staged = git_output(["ls-files", "--stage", "-z"], folder_path, env)
+    files = {}
+    for line in filter(None, staged.split("\0")):
+        info, path = line.split("\t", 1)
+        blob = info.split()[1]
+        if path in stats:
+            files[path] = [stats[path][0], stats[path][1], blob]
+    save_manifest(repo_name, head, files)
+
+def push_folder_incremental(folder_path, repo_name, env=None):
+    """Коммитит только изменения папки поверх main на GitHub и пушит без --force.
+    Возвращает False, если ветки main на GitHub ещё нет (нужна первая полная заливка).
+    env не должен направлять запись в SHARED_STORE: shallow/blobless история
+    должна оставаться в собственном .git папки.
+    """
+    ls_remote = git_output(["ls-remote", "origin", "refs/heads/main"], folder_path, env)
+    if not ls_remote.strip():
+        return False
+    remote_head = ls_remote.split()[0]
+
+    # Забираем только последний коммит и его деревья, без содержимого файлов
+    git_output(["fetch", "--depth=1", "--filter=blob:none", "origin", "main"], folder_path, env)
+
+    manifest_head, manifest = load_manifest(repo_name)
+    if manifest_head != remote_head:
+        # На GitHub не то, что заливали мы в прошлый раз — хешируем всё заново
+        manifest = {}
+
+    # Собираем дерево во временном индексе, рабочий индекс не трогаем до конца
+    index_path = os.path.abspath(os.path.join(folder_path, ".git", "index.incremental"))
+    if os.path.exists(index_path):
+        os.remove(index_path)
+    index_env = dict(env or os.environ)
+    index_env["GIT_INDEX_FILE"] = index_path
+
+    # Список файлов — тот же, что увидел бы git add . (с учётом .gitignore)
+    listed = git_output(["ls-files", "--others", "--exclude-standard", "-z"], folder_path, index_env)
+    files = {}
+    to_hash = []
+    for path in filter(None, listed.split("\0")):
+        if path.endswith("/"):
+            print(f"[WARN] Вложенный репозиторий пропущен: {folder_path}/{path}")
+            continue
+        # OSError (файл исчез, нет доступа) прерывает только эту папку — см. push_folder_to_github
+        full_path = os.path.join(folder_path, path)
+        st = os.lstat(full_path)
+        if stat.S_ISLNK(st.st_mode):
+            # ссылку git хранит как blob с её целью, а не с содержимым файла
+            mode = "120000"
+        else:
+            mode = "100755" if os.name != "nt" and st.st_mode & 0o111 else "100644"
+        cached = manifest.get(path)
+        if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            files[path] = [st.st_size, st.st_mtime_ns, cached[2], mode]
+        else:
+            files[path] = [st.st_size, st.st_mtime_ns, None, mode]
+            to_hash.append(path)
+
+    links = [path for path in to_hash if files[path][3] == "120000"]
+    for path in links:
+        files[path][2] = git_output(["hash-object", "-w", "--stdin", "--no-filters"], folder_path, index_env,
+                                    input=os.readlink(os.path.join(folder_path, path))).strip()
+    regular = [path for path in to_hash if files[path][3] != "120000"]
+    if regular:
+        blobs = git_output(["hash-object", "-w", "--stdin-paths"], folder_path, index_env,
+                           input="".join(f"{path}\n" for path in regular)).split()
+        for path, blob in zip(regular, blobs):
+            files[path][2] = blob
+
+    git_output(["update-index", "-z", "--index-info"], folder_path, index_env,
+               input="".join(f"{mode} {blob}\t{path}\0" for path, (_, _, blob, mode) in files.items()))
+    # --missing-ok: неизменные blob-ы есть только на GitHub, локально их не скачивали
+    tree = git_output(["write-tree", "--missing-ok"], folder_path, index_env).strip()
+    remote_tree = git_output(["rev-parse", f"{remote_head}^{{tree}}"], folder_path, env).strip()
+
+    if tree == remote_tree:
+        head = remote_head
+    else:
+        head = git_output(["commit-tree", tree, "-p", remote_head, "-m", "ya"], folder_path, env).strip()
+
+    # main указывает на залитое состояние и без изменений — иначе при свежем .git
+    # HEAD остался бы пустым, а новый индекс выглядел бы как сплошь добавленные файлы
+    git_output(["update-ref", "refs/heads/main", head], folder_path, env)
+    git_output(["symbolic-ref", "HEAD", "refs/heads/main"], folder_path, env)
+
+    if head == remote_head:
+        print(f"[SKIP] {folder_path} → {repo_name}: изменений нет")
+    else:
+        subprocess.run("git push -u origin main", cwd=folder_path, shell=True, check=True, env=env)
+        print(f"[PUSHED] {folder_path} → {repo_name} (изменено файлов: {len(to_hash)})")
+
+    os.replace(index_path, os.path.join(folder_path, ".git", "index"))
+    # В хранилище не закрепляем: история здесь shallow и без blob-ов
+    save_manifest(repo_name, head, {path: entry[:3] for path, entry in files.items()})
+    return True
+
 def push_folder_to_github(folder_path, repo_name):
     """Инициализировать и запушить папку на GitHub"""
     try:
         # Инициализация git
         subprocess.run("git init", cwd=folder_path, shell=True, check=True)
-        subprocess.run("git add .", cwd=folder_path, shell=True, check=True)
-        subprocess.run('git commit -m "ya"', cwd=folder_path, shell=True, check=True)
+        env = None
+        if SHARED_STORE:
+            # Объекты пишутся в общее хранилище, уже известные — пропускаются
+            link_to_shared_store(folder_path, SHARED_STORE)
+            env = shared_store_env(folder_path, SHARED_STORE)
 
         # Добавляем remote
         remote_url = f"https://{GITHUB_TOKEN}@github.com/{ORG_NAME}/{repo_name}.git"
         subprocess.run("git remote remove origin", cwd=folder_path, shell=True)
         subprocess.run(f"git remote add origin {remote_url}", cwd=folder_path, shell=True, check=True)
 
+        # Репозиторий на GitHub уже наполнен — дозаливаем только изменения.
+        # Без env хранилища: fetch и коммиты пишутся в собственный .git папки
+        # (хранилище через alternates по-прежнему избавляет от дублей)
+        if INCREMENTAL and push_folder_incremental(folder_path, repo_name):
+            return
+
+        stats = stat_listed_files(folder_path, env) if INCREMENTAL else None
+        subprocess.run("git add .", cwd=folder_path, shell=True, check=True, env=env)
+        subprocess.run('git commit -m "ya"', cwd=folder_path, shell=True, check=True, env=env)
+        if SHARED_STORE:
+            pin_in_shared_store(folder_path, SHARED_STORE, repo_name)
+
         # Пушим
         subprocess.run("git branch -M main", cwd=folder_path, shell=True, check=True)
         subprocess.run("git push -u origin main --force", cwd=folder_path, shell=True, check=True)
+        if INCREMENTAL:
+            # чтобы следующее обновление не хешировало папку целиком
+            save_manifest_from_index(folder_path, repo_name, stats, env)
 
         print(f"[PUSHED] {folder_path} → {repo_name}")
 
     except subprocess.CalledProcessError as e:
         print(f"[ERROR] Git ошибка в {folder_path}: {e}")
+    except OSError as e:
+        print(f"[ERROR] Ошибка файловой системы в {folder_path}: {e}")
 
 def main():
     for folder in os.listdir(BASE_PATH):
@@ -1,11 +1,21 @@
 import os
 import subprocess
 
+from shared_store import link_to_shared_store, shared_store_env, pin_in_shared_store
+
 # Путь к корневой папке
 base_path = r"x:\.trash\ya\WAITING_POOLING"
 
+# Общее хранилище объектов для всех репозиториев (None — каждый .git хранит всё сам).
+# Пример: r"x:\.trash\ya\+shared-objects.git"
+shared_store = None
+
 # Обходим все подпапки
 for root, dirs, files in os.walk(base_path):
+    # Само хранилище не обходим
+    if shared_store:
+        dirs[:] = [d for d in dirs if os.path.abspath(os.path.join(root, d)) != os.path.abspath(shared_store)]
+
     for d in dirs:
         folder_path = os.path.join(root, d)
 
@@ -16,8 +26,16 @@ for root, dirs, files in os.walk(base_path):
             try:
                 # Переходим в папку и выполняем команды
                 subprocess.run("git init", cwd=folder_path, shell=True, check=True)
-                subprocess.run("git add *", cwd=folder_path, shell=True, check=True)
-                subprocess.run('git commit -m "ya"', cwd=folder_path, shell=True, check=True)
+                if shared_store:
+                    # Объекты пишутся в общее хранилище, уже известные — пропускаются
+                    link_to_shared_store(folder_path, shared_store)
+                    env = shared_store_env(folder_path, shared_store)
+                    subprocess.run("git add *", cwd=folder_path, shell=True, check=True, env=env)
+                    subprocess.run('git commit -m "ya"', cwd=folder_path, shell=True, check=True, env=env)
+                    pin_in_shared_store(folder_path, shared_store, os.path.relpath(folder_path, base_path))
+                else:
+                    subprocess.run("git add *", cwd=folder_path, shell=True, check=True)
+                    subprocess.run('git commit -m "ya"', cwd=folder_path, shell=True, check=True)
             except subprocess.CalledProcessError as e:
                 print(f"Ошибка в {folder_path}: {e}")
 
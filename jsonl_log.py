@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+jsonl_log.py
+
+Логирование для git_batch*.py через фоновый поток.
+
+Поведение:
+ - основной цикл только кладёт запись в очередь (QueueHandler);
+ - отдельный поток (QueueListener) пишет её в консоль и в JSONL-файл;
+ - файл ротируется по размеру: log.jsonl, log.jsonl.1, ... ;
+ - обычные сообщения пишутся как {"ts", "level", "msg"};
+ - события шагов (log_event) — как {"ts", "level", "stage", "folder",
+   "duration", "bytes", "exit_code", "error"} и в консоль не выводятся;
+   общий шаг нескольких папок (пуш пачки) — одно событие со списком "folders".
+
+Разбор логов — run_report.py.
+"""
+
+import sys
+import json
+import atexit
+import logging
+import logging.handlers
+from queue import Queue
+from datetime import datetime
+
+# --------------
+LOG_MAX_BYTES = 10 * 1024 * 1024  # размер файла до ротации
+LOG_BACKUP_COUNT = 5              # сколько старых файлов хранить
+# --------------
+
+EVENT_FIELDS = ("stage", "folder", "folders", "duration", "bytes", "exit_code", "error")
+
+events = logging.getLogger("events")
+
+
+class JsonlFormatter(logging.Formatter):
+    """Одна запись — одна компактная JSON-строка."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+        }
+        if record.name == events.name:
+            for field in EVENT_FIELDS:
+                value = getattr(record, field, None)
+                if value is not None:
+                    entry[field] = value
+        else:
+            entry["msg"] = record.getMessage()
+        return json.dumps(entry, ensure_ascii=False, separators=(",", ":"))
+
+
+def setup_logging(log_file, max_bytes=LOG_MAX_BYTES, backup_count=LOG_BACKUP_COUNT):
+    """Настраивает корневой логгер: очередь + фоновая запись в консоль и log_file."""
+    file_handler = logging.handlers.RotatingFileHandler(
+        log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+    )
+    file_handler.setFormatter(JsonlFormatter())
+
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(message)s"))
+    console_handler.addFilter(lambda record: record.name != events.name)
+
+    queue = Queue(-1)
+    queue_handler = logging.handlers.QueueHandler(queue)
+    # в очередь уходит только текст сообщения, оформление — у обработчиков слушателя
+    queue_handler.setFormatter(logging.Formatter("%(message)s"))
+    listener = logging.handlers.QueueListener(queue, file_handler, console_handler)
+    logging.basicConfig(level=logging.INFO, handlers=[queue_handler])
+    listener.start()
+    # дописать очередь до конца при выходе (в том числе через sys.exit)
+    atexit.register(listener.stop)
+    return listener
+
+
+def log_event(stage, folder=None, level=logging.INFO, **fields):
+    """Структурное событие шага: stage, folder, duration, bytes, exit_code, error.
+    Для шага, общего для нескольких папок, вместо folder передаётся folders=[...].
+    """
+    fields = {key: value for key, value in fields.items() if value is not None}
+    events.log(level, f"{stage} {folder or ''}".strip(), extra=dict(fields, stage=stage, folder=folder))
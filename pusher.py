@@ -1,18 +1,178 @@
 import os
+import sys
+import shutil
+import tempfile
 import subprocess
 import requests
 import json
+from concurrent.futures import ThreadPoolExecutor
 
 ORG_NAME = "biggest-backups-projects"
 BASE_PATH = r"x:\.trash\ya"
+LS_REMOTE_WORKERS = 16  # параллельных git ls-remote при сверке с удалёнными репо
+VERIFY_AFTER_PUSH = True  # сверять деревья на GitHub с папками после пуша
+VERIFY_WORKERS = 16       # параллельных проверок
+REPUSH_QUEUE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "repush_queue.txt")
+
+def remote_url_for(repo_name):
+    return f"https://github.com/{ORG_NAME}/{repo_name}.git"
+
+def local_head(folder_path):
+    """SHA локального HEAD или None, если коммитов нет / это не репозиторий"""
+    res = subprocess.run(["git", "rev-parse", "--verify", "HEAD"], cwd=folder_path,
+                         capture_output=True, text=True)
+    return res.stdout.strip() if res.returncode == 0 else None
+
+def remote_head(repo_name):
+    """SHA ветки main на GitHub или None (репо пустое, нет доступа и т.п.)"""
+    res = subprocess.run(["git", "ls-remote", remote_url_for(repo_name), "refs/heads/main"],
+                         capture_output=True, text=True)
+    if res.returncode != 0 or not res.stdout.strip():
+        return None
+    return res.stdout.split()[0]
+
+def ensure_origin(folder_path, remote_url):
+    """origin мог остаться с прошлого (прерванного) запуска — тогда только обновляем url"""
+    has_origin = subprocess.run("git remote get-url origin", cwd=folder_path, shell=True,
+                                capture_output=True).returncode == 0
+    if has_origin:
+        subprocess.run(f"git remote set-url origin {remote_url}", cwd=folder_path, shell=True, check=True)
+    else:
+        subprocess.run(f"git remote add origin {remote_url}", cwd=folder_path, shell=True, check=True)
+
+def disk_tree(folder_path):
+    """id дерева папки в том виде, как она лежит на диске (без коммита).
+    Считается во временной копии индекса: перехешируются только изменённые файлы.
+    """
+    git_dir = os.path.join(folder_path, ".git")
+    index_path = os.path.abspath(os.path.join(git_dir, "index.verify"))
+    if os.path.isfile(os.path.join(git_dir, "index")):
+        shutil.copyfile(os.path.join(git_dir, "index"), index_path)
+    env = dict(os.environ, GIT_INDEX_FILE=index_path)
+    try:
+        subprocess.run(["git", "add", "-A"], cwd=folder_path, env=env, capture_output=True, check=True)
+        return subprocess.run(["git", "write-tree"], cwd=folder_path, env=env,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    finally:
+        if os.path.exists(index_path):
+            os.remove(index_path)
+
+def rev_parse(folder_path, rev):
+    res = subprocess.run(["git", "rev-parse", "--verify", "--quiet", rev], cwd=folder_path,
+                         capture_output=True, text=True)
+    return res.stdout.strip() if res.returncode == 0 else None
+
+def remote_commit_tree(folder_path, repo_name, commit):
+    """id дерева коммита commit ветки main на GitHub.
+    Если коммит уже есть локально — читаем его без сети. Иначе забираем только сам
+    коммит (--filter=tree:0) во временный bare-репозиторий, чтобы не менять
+    конфиг (promisor, partialclonefilter) и .git/shallow папки.
+    """
+    tree = rev_parse(folder_path, f"{commit}^{{tree}}")
+    if tree is not None:
+        return tree
+    with tempfile.TemporaryDirectory(prefix="ya-verify-", ignore_cleanup_errors=True) as scratch:
+        subprocess.run(["git", "init", "--bare", "--quiet", scratch], capture_output=True, check=True)
+        fetched = subprocess.run(["git", "fetch", "--quiet", "--depth=1", "--filter=tree:0",
+                                  remote_url_for(repo_name), "refs/heads/main"],
+                                 cwd=scratch, capture_output=True, text=True)
+        if fetched.returncode != 0:
+            raise RuntimeError(f"не удалось получить main: {fetched.stderr.strip()}")
+        return rev_parse(scratch, "FETCH_HEAD^{tree}")
+
+def is_ancestor(folder_path, commit, head):
+    """Есть ли commit в истории head (тогда обычный пуш пройдёт fast-forward)"""
+    if rev_parse(folder_path, f"{commit}^{{commit}}") is None:
+        return False
+    return subprocess.run(["git", "merge-base", "--is-ancestor", commit, head], cwd=folder_path,
+                          capture_output=True).returncode == 0
+
+def verify_folder(folder_path, repo_name):
+    """Сверяет папку с веткой main на GitHub по id деревьев.
+    Возвращает (None, False), если всё совпало, иначе (текст расхождения,
+    поможет ли повторный пуш). Ошибки проверки тоже возвращаются как расхождение,
+    чтобы одна сломанная папка не обрывала проверку остальных.
+    """
+    try:
+        return check_folder(folder_path, repo_name)
+    except (subprocess.CalledProcessError, OSError, RuntimeError) as e:
+        return f"проверка не удалась: {e}", False
+
+def check_folder(folder_path, repo_name):
+    head = local_head(folder_path)
+    if head is None:
+        return "локальных коммитов нет", False
+    remote = remote_head(repo_name)
+    if remote is None:
+        return "на GitHub нет ветки main", True
+
+    local_tree = disk_tree(folder_path)
+    if local_tree != rev_parse(folder_path, "HEAD^{tree}"):
+        return "папка на диске отличается от HEAD (не закоммичено)", False
+
+    if remote == head:
+        return None, False
+
+    # Коммиты разные — но содержимое может совпадать; сравниваем деревья
+    remote_tree = remote_commit_tree(folder_path, repo_name, remote)
+    if remote_tree == local_tree:
+        return None, False
+
+    problem = f"дерево на GitHub {(remote_tree or '?')[:7]} != локальное {local_tree[:7]}"
+    # Обычный (не --force) пуш поможет, только если GitHub просто отстаёт
+    if is_ancestor(folder_path, remote, head):
+        return problem, True
+    return problem + " (история на GitHub расходится, нужен ручной разбор)", False
+
+def verify_folders(folders):
+    """Параллельно проверяет папки; те, что исправит повторный пуш, пишет в очередь"""
+    with ThreadPoolExecutor(max_workers=VERIFY_WORKERS) as pool:
+        results = list(pool.map(lambda item: verify_folder(*item), folders))
+
+    mismatched = []
+    requeue = []
+    for (folder_path, repo_name), (problem, repush) in zip(folders, results):
+        if problem is None:
+            continue
+        print(f"[MISMATCH] {folder_path} → {repo_name}: {problem}")
+        mismatched.append(folder_path)
+        if repush:
+            requeue.append(folder_path)
+
+    with open(REPUSH_QUEUE_FILE, "w", encoding="utf-8") as f:
+        f.writelines(f"{folder_path}\n" for folder_path in requeue)
+    print(f"Проверено: {len(folders)}, расхождений: {len(mismatched)}, в очередь на пуш: {len(requeue)}")
+    return mismatched
+
+def load_repush_queue():
+    if not os.path.isfile(REPUSH_QUEUE_FILE):
+        return set()
+    with open(REPUSH_QUEUE_FILE, "r", encoding="utf-8") as f:
+        return {line.strip() for line in f if line.strip()}
+
+def collect_pending(folders):
+    """Сверяет локальные HEAD с удалёнными main пачкой параллельных ls-remote.
+    folders — список (folder_path, repo_name); возвращает только те, что нужно пушить.
+    """
+    heads = [local_head(folder_path) for folder_path, _ in folders]
+    with ThreadPoolExecutor(max_workers=LS_REMOTE_WORKERS) as pool:
+        remotes = list(pool.map(remote_head, [repo_name for _, repo_name in folders]))
+
+    pending = []
+    for (folder_path, repo_name), local, remote in zip(folders, heads, remotes):
+        if local is not None and local == remote:
+            print(f"[SKIP] {folder_path} → {repo_name}: main уже {local[:7]}")
+        else:
+            pending.append((folder_path, repo_name))
+    return pending
 
 def push_folder_to_github(folder_path, repo_name):
     """пуш папки на GitHub"""
     try:
         # Добавляем remote
-        remote_url = f"https://github.com/{ORG_NAME}/{repo_name}.git"
+        remote_url = remote_url_for(repo_name)
         #subprocess.run("git remote remove origin", cwd=folder_path, shell=True)
-        subprocess.run(f"git remote add origin {remote_url}", cwd=folder_path, shell=True, check=True)
+        ensure_origin(folder_path, remote_url)
 
         # Пушим
         subprocess.run("git branch -M main", cwd=folder_path, shell=True, check=True)
@@ -24,15 +184,34 @@ def push_folder_to_github(folder_path, repo_name):
         print(f"[ERROR] Git ошибка в {folder_path}: {e}")
 
 def main():
+    folders = []
     for folder in os.listdir(BASE_PATH):
         folder_path = os.path.join(BASE_PATH, folder)
 
         # Проверяем что это папка и не начинается с "+"
         if os.path.isdir(folder_path) and not folder.startswith("+"):
             repo_name = f"ya.{folder}"
+            folders.append((folder_path, repo_name))
+
+    # Только проверка, без пуша: python pusher.py --verify
+    if "--verify" in sys.argv[1:]:
+        verify_folders(folders)
+        return
+
+    # Пушим только то, чего ещё нет на GitHub (повторный запуск доделывает остаток);
+    # не прошедшие прошлую проверку — первыми и без сверки
+    queued = load_repush_queue()
+    pending = [item for item in folders if item[0] in queued]
+    requeued = len(pending)
+    pending += collect_pending([item for item in folders if item[0] not in queued])
+    print(f"К пушу: {len(pending)} из {len(folders)} (из очереди повторного пуша: {requeued})")
+
+    for folder_path, repo_name in pending:
+        # Пуш содержимого
+        push_folder_to_github(folder_path, repo_name)
 
-            # Пуш содержимого
-            push_folder_to_github(folder_path, repo_name)
+    if VERIFY_AFTER_PUSH:
+        verify_folders(folders)
 
 if __name__ == "__main__":
     main()
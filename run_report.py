@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+run_report.py
+
+Отчёт по JSONL-логам git_batch*.py (см. jsonl_log.py).
+
+Запуск:
+    python run_report.py                       (все log*.jsonl* рядом со скриптом)
+    python run_report.py log.jsonl log.jsonl.1 [--top 20]
+
+Выводит:
+ - список папок с ошибками (шаг, код выхода, текст ошибки последней неудачи);
+ - самые медленные папки по суммарному времени собственных шагов
+   (общие шаги вроде пуша пачки в сумму папок не входят).
+
+Файлы читаются построчно, в памяти — только по записи на папку.
+Строки, которые не являются JSON (старые текстовые логи), пропускаются.
+"""
+
+import os
+import re
+import sys
+import glob
+import json
+import heapq
+
+DEFAULT_TOP = 20
+
+
+def order_log_files(paths):
+    """Хронологический порядок файлов: RotatingFileHandler пишет в log.jsonl,
+    а старые части сдвигает в log.jsonl.1, .2, ... (чем больше номер, тем старше).
+    Внутри каждого семейства — от старших номеров к младшим, базовый файл последним.
+    """
+    def key(path):
+        match = re.match(r"^(.*)\.(\d+)$", path)
+        if match:
+            return match.group(1), -int(match.group(2))
+        return path, 0
+    return sorted(paths, key=key)
+
+
+def iter_events(paths):
+    """Потоково отдаёт события шагов (записи с полем stage) из файлов paths."""
+    for path in paths:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(entry, dict) and "stage" in entry:
+                    yield entry
+
+
+def build_report(paths):
+    """Возвращает (failures, durations):
+    failures  — {папка: последнее неудачное событие};
+    durations — {папка: суммарная длительность собственных шагов, сек}.
+    """
+    failures = {}
+    durations = {}
+    for entry in iter_events(paths):
+        if "folders" in entry:
+            # общий шаг пачки: ошибка относится к каждой папке, время — ни к одной
+            for folder in entry["folders"]:
+                if entry.get("level") == "ERROR" or entry.get("exit_code", 0) != 0:
+                    failures[folder] = entry
+                elif failures.get(folder, {}).get("stage") == entry["stage"]:
+                    failures.pop(folder, None)
+            continue
+        folder = entry.get("folder")
+        if not folder:
+            continue
+        if entry["stage"] in ("done", "skip"):
+            # папка в итоге обработана — прошлые ошибки по ней уже неактуальны
+            failures.pop(folder, None)
+            continue
+        durations[folder] = durations.get(folder, 0.0) + entry.get("duration", 0.0)
+        if entry.get("level") == "ERROR" or entry.get("exit_code", 0) != 0:
+            failures[folder] = entry
+        elif failures.get(folder, {}).get("stage") == entry["stage"]:
+            # тот же шаг позже прошёл успешно (например, пуш пачки)
+            failures.pop(folder, None)
+    return failures, durations
+
+
+def main():
+    args = sys.argv[1:]
+    top = DEFAULT_TOP
+    if "--top" in args:
+        i = args.index("--top")
+        top = int(args[i + 1])
+        del args[i:i + 2]
+
+    paths = order_log_files(args or glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "log*.jsonl*")))
+    if not paths:
+        print("Логи не найдены.")
+        sys.exit(1)
+
+    failures, durations = build_report(paths)
+
+    print(f"Ошибки ({len(failures)}):")
+    for folder in sorted(failures):
+        entry = failures[folder]
+        print(f"  {folder}: [{entry['stage']}] код {entry.get('exit_code', '?')} {entry.get('error', '')}".rstrip())
+
+    print(f"\nСамые медленные папки (top {top}):")
+    for folder, duration in heapq.nlargest(top, durations.items(), key=lambda item: item[1]):
+        print(f"  {duration:10.2f} с  {folder}")
+
+
+if __name__ == "__main__":
+    main()
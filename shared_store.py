@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+shared_store.py
+
+Общее локальное хранилище git-объектов для репозиториев "одна папка — один репо".
+
+Поведение:
+ - хранилище — обычный bare-репозиторий (создаётся при первом обращении);
+ - .git/objects/info/alternates каждой папки указывает на objects хранилища,
+   поэтому объекты из хранилища видны репозиторию без копирования;
+ - git add / commit запускаются с GIT_OBJECT_DIRECTORY = objects хранилища:
+   новые объекты пишутся сразу туда, а уже известные git пропускает
+   (перед записью он проверяет наличие объекта, в том числе в alternates);
+ - у папки, где уже был .git, при первой привязке история копируется в
+   хранилище (git fetch недостающих объектов), иначе новый коммит ссылался
+   бы на родителя, которого в хранилище нет;
+ - HEAD каждой папки закрепляется ссылкой refs/folders/<имя> в хранилище,
+   чтобы git gc в хранилище не удалил объекты как недостижимые; коммит, чья
+   история в хранилище неполная (shallow / partial clone), не закрепляется.
+
+Хранилище нельзя удалять, пока живы привязанные к нему репозитории.
+"""
+
+import hashlib
+import os
+import re
+import subprocess
+
+
+def ensure_shared_store(store_path):
+    """Создаёт bare-репозиторий хранилища, если его ещё нет.
+    Возвращает абсолютный путь к его каталогу objects.
+    """
+    store_path = os.path.abspath(store_path)
+    objects_dir = os.path.join(store_path, "objects")
+    if not os.path.isdir(objects_dir):
+        subprocess.run(["git", "init", "--bare", "--quiet", store_path], check=True)
+    return objects_dir
+
+
+def import_local_objects(folder_path, store_path):
+    """Копирует историю HEAD папки в хранилище (только недостающие объекты).
+    Shallow и partial clone репозитории пропускаются — их история неполная.
+    """
+    head = subprocess.run(["git", "rev-parse", "--verify", "--quiet", "HEAD"], cwd=folder_path,
+                          capture_output=True, text=True).stdout.strip()
+    if not head:
+        return
+    shallow = subprocess.run(["git", "rev-parse", "--is-shallow-repository"], cwd=folder_path,
+                             capture_output=True, text=True).stdout.strip() == "true"
+    promisor = subprocess.run(["git", "config", "--get-regexp", r"^remote\..*\.promisor$"], cwd=folder_path,
+                              capture_output=True).returncode == 0
+    if shallow or promisor:
+        print(f"[WARN] {folder_path}: история неполная (shallow/partial clone), в хранилище не копируется")
+        return
+    subprocess.run(
+        ["git", "--git-dir", os.path.abspath(store_path), "fetch", "--quiet", "--no-tags",
+         os.path.abspath(folder_path), "HEAD"],
+        capture_output=True,
+        check=True
+    )
+
+
+def link_to_shared_store(folder_path, store_path):
+    """Прописывает хранилище в .git/objects/info/alternates папки (один раз).
+    Перед первой привязкой переносит в хранилище уже существующую историю.
+    """
+    objects_dir = ensure_shared_store(store_path)
+    info_dir = os.path.join(folder_path, ".git", "objects", "info")
+    os.makedirs(info_dir, exist_ok=True)
+
+    # git понимает прямые слэши и на Windows
+    line = objects_dir.replace("\\", "/")
+    alternates = os.path.join(info_dir, "alternates")
+    existing = []
+    if os.path.isfile(alternates):
+        with open(alternates, "r", encoding="utf-8") as f:
+            existing = [l.strip() for l in f if l.strip()]
+    if line not in existing:
+        import_local_objects(folder_path, store_path)
+        with open(alternates, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+def shared_store_env(folder_path, store_path):
+    """Окружение для git-команд в папке: запись объектов идёт в хранилище.
+    Локальный .git/objects остаётся доступным на чтение; история, что там
+    была до включения режима, копируется в хранилище в link_to_shared_store.
+    """
+    env = os.environ.copy()
+    env["GIT_OBJECT_DIRECTORY"] = ensure_shared_store(store_path)
+    env["GIT_ALTERNATE_OBJECT_DIRECTORIES"] = os.path.abspath(
+        os.path.join(folder_path, ".git", "objects")
+    )
+    return env
+
+
+def pin_in_shared_store(folder_path, store_path, name):
+    """Закрепляет текущий HEAD папки ссылкой refs/folders/<name> в хранилище.
+    Если хранилище не содержит всей истории HEAD, ссылка не ставится:
+    иначе git gc в хранилище падал бы на обходе родителей.
+    """
+    head = subprocess.run(
+        ["git", "rev-parse", "HEAD"],
+        cwd=folder_path,
+        env=shared_store_env(folder_path, store_path),
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout.strip()
+
+    complete = subprocess.run(
+        ["git", "--git-dir", os.path.abspath(store_path), "rev-list", "--objects", "--quiet", head],
+        capture_output=True
+    ).returncode == 0
+    if not complete:
+        print(f"[WARN] {folder_path}: история {head[:7]} в хранилище неполная, не закрепляю")
+        return
+
+    # только безопасные для имени ссылки символы (точки, слэши и т.п. -> "_"),
+    # хвост из хеша исходного имени не даёт двум папкам делить одну ссылку
+    ref_name = re.sub(r"[^A-Za-z0-9_-]", "_", name)
+    ref_name += "-" + hashlib.sha1(name.encode("utf-8")).hexdigest()[:8]
+    subprocess.run(
+        ["git", "--git-dir", os.path.abspath(store_path), "update-ref", f"refs/folders/{ref_name}", head],
+        check=True
+    )